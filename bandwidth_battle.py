@@ -1,9 +1,7 @@
-import random
-import heapq
 from collections import deque
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
-import copy
+import numpy as np
 
 # ==========================================
 # 1. CONFIGURATION
@@ -11,21 +9,29 @@ import copy
 BUFFER_SIZE = 20
 ROUTER_SPEED = 0.7 
 CHOKE_THRESHOLD = 8
-WEIGHTS = {'Gold': 4.0, 'Silver': 2.0, 'Bronze': 1.0}
+# Traffic classes are interned as small ints; per-class tuples below are
+# indexed by class id (Gold, Silver, Bronze)
+GOLD, SILVER, BRONZE = 0, 1, 2
+WEIGHTS = (4.0, 2.0, 1.0)
+INV_W = tuple(1.0 / w for w in WEIGHTS)
+TOKEN_CAP = (10.0, 5.0, 2.0)
+TOKEN_RATE = (5.0, 0.5, 0.2)
 PACKETS_PER_FRAME = 30  # Slightly slower to see the "waves"
+SIM_FRAMES_PER_RENDER = 2  # Simulation frames advanced per redraw
+WINDOW = 100  # Frames visible in the sliding plot window
 
 # ==========================================
 # 2. PACKET CLASS
 # ==========================================
 class Packet:
-    def __init__(self, id, type, arrival_time):
+    # No per-instance __dict__: smaller packets and faster attribute access
+    __slots__ = ('id', 'type_id', 'arrival_time', 'size')
+
+    def __init__(self, id, type_id, arrival_time, size):
         self.id = id
-        self.type = type
+        self.type_id = type_id
         self.arrival_time = arrival_time
-        self.size = random.randint(1, 3) 
-        self.finish_time = 0      
-    def __lt__(self, other):
-        return self.id < other.id
+        self.size = size
 
 # ==========================================
 # 3. SIMULATION ENGINES (Throughput Focus)
@@ -34,104 +40,133 @@ class SimulationEngine:
     def __init__(self, name):
         self.name = name
         self.buffer = deque()
+        # Bound once so the per-packet hot path skips the attribute lookups
+        self._append = self.buffer.append
+        self._popleft = self.buffer.popleft
+        self._n = 0 # Cached queue length, kept in step with every append/pop
         # Instantaneous Throughput (Reset every frame)
-        self.frame_served = {'Gold': 0, 'Silver': 0, 'Bronze': 0}
-        # History for plotting
-        self.hist_gold = []
-        self.hist_silver = []
-        self.hist_bronze = []
+        self.frame_served = [0, 0, 0]
+        # History for plotting: ring buffer of rows (Gold, Silver, Bronze)
+        self.hist = np.zeros((3, WINDOW), dtype=np.int32)
+        self.idx = 0
     
     def reset_frame_stats(self):
-        self.frame_served = {'Gold': 0, 'Silver': 0, 'Bronze': 0}
+        self.frame_served = [0, 0, 0]
 
     def record_history(self):
-        self.hist_gold.append(self.frame_served['Gold'])
-        self.hist_silver.append(self.frame_served['Silver'])
-        self.hist_bronze.append(self.frame_served['Bronze'])
-
-    def service(self):
-        if self.buffer and random.random() < ROUTER_SPEED:
-            p = self.buffer.popleft()
-            self.frame_served[p.type] += 1
+        self.hist[:, self.idx % WINDOW] = self.frame_served
+        self.idx += 1
+
+    def history_view(self):
+        # Oldest-to-newest view of the ring buffer
+        if self.idx < WINDOW:
+            return self.hist[:, :self.idx]
+        return np.roll(self.hist, -(self.idx % WINDOW), axis=1)
+
+    def service(self, serve):
+        if serve and self._n:
+            p = self._popleft()
+            self._n -= 1
+            self.frame_served[p.type_id] += 1
             return True
         return False
 
-    def process_step(self, p):
+    def process_step(self, p, serve):
         raise NotImplementedError
 
 # --- 1. BASELINE ---
 class BaselineSim(SimulationEngine):
-    def process_step(self, p):
-        self.service()
-        if len(self.buffer) < BUFFER_SIZE:
-            self.buffer.append(p)
+    def process_step(self, p, serve):
+        self.service(serve)
+        if self._n < BUFFER_SIZE:
+            self._append(p)
+            self._n += 1
     
 # --- 2. CHOKE ---
 class ChokeSim(SimulationEngine):
-    def process_step(self, p):
-        self.service()
-        is_congested = len(self.buffer) > CHOKE_THRESHOLD
+    def process_step(self, p, serve):
+        self.service(serve)
+        is_congested = self._n > CHOKE_THRESHOLD
         
         if is_congested:
-            if p.type == 'Gold':
-                if len(self.buffer) < BUFFER_SIZE: self.buffer.append(p)
+            if p.type_id == GOLD:
+                if self._n < BUFFER_SIZE:
+                    self._append(p)
+                    self._n += 1
             else: pass # Drop
         else:
-            if len(self.buffer) < BUFFER_SIZE: self.buffer.append(p)
+            if self._n < BUFFER_SIZE:
+                self._append(p)
+                self._n += 1
 
 # --- 3. TOKEN ---
 class TokenSim(SimulationEngine):
     def __init__(self, name):
         super().__init__(name)
-        self.buckets = {'Gold': [10, 10, 5.0], 'Silver': [5, 5, 0.5], 'Bronze': [2, 2, 0.2]}
+        self.tok = list(TOKEN_CAP)  # Buckets start full
+        self.last_refill = [0, 0, 0]  # Step at which each bucket was last topped up
+        self.step = 0
 
-    def process_step(self, p):
-        self.service()
-        for t in self.buckets:
-            cur, cap, rate = self.buckets[t]
-            self.buckets[t][0] = min(cap, cur + rate)
+    def process_step(self, p, serve):
+        self.service(serve)
+        # Lazy refill: top up only the arriving packet's bucket, covering
+        # every step since it was last touched
+        self.step += 1
+        t = p.type_id
+        tok = self.tok
+        tok[t] = min(TOKEN_CAP[t], tok[t] + TOKEN_RATE[t] * (self.step - self.last_refill[t]))
+        self.last_refill[t] = self.step
             
         needed = 1
-        if self.buckets[p.type][0] >= needed:
-            if len(self.buffer) < BUFFER_SIZE:
-                self.buckets[p.type][0] -= needed
-                self.buffer.append(p)
+        if tok[t] >= needed:
+            if self._n < BUFFER_SIZE:
+                tok[t] -= needed
+                self._append(p)
+                self._n += 1
 
 # --- 4. WFQ ---
 class WFQSim(SimulationEngine):
     def __init__(self, name):
         super().__init__(name)
-        self.buffer = [] # Heap
-        self.last_finish = {'Gold': 0, 'Silver': 0, 'Bronze': 0}
+        # One deque per class, each already in finish-time order because
+        # last_finish is monotone per class
+        self.qs = [deque(), deque(), deque()]
+        self._q_append = [q.append for q in self.qs]
+        self._pop_bronze = self.qs[BRONZE].pop
+        self._seq = 0 # Monotone tiebreaker: FIFO among equal finish times
+        self.last_finish = [0, 0, 0]
 
-    def service(self):
-        if self.buffer and random.random() < ROUTER_SPEED:
-            _, p = heapq.heappop(self.buffer)
-            self.frame_served[p.type] += 1
+    def service(self, serve):
+        if serve and self._n:
+            # Serve the class head with the smallest (finish, seq)
+            best = None
+            for q in self.qs:
+                if q and (best is None or q[0] < best[0]):
+                    best = q
+            _, _, p = best.popleft()
+            self._n -= 1
+            self.frame_served[p.type_id] += 1
             return True
         return False
 
-    def process_step(self, p):
-        self.service()
-        prev_f = self.last_finish[p.type]
-        v_finish = max(p.arrival_time, prev_f) + (p.size / WEIGHTS[p.type])
-        p.finish_time = v_finish
-        self.last_finish[p.type] = v_finish
+    def process_step(self, p, serve):
+        self.service(serve)
+        prev_f = self.last_finish[p.type_id]
+        v_finish = max(p.arrival_time, prev_f) + p.size * INV_W[p.type_id]
+        self.last_finish[p.type_id] = v_finish
         
-        if len(self.buffer) < BUFFER_SIZE:
-            heapq.heappush(self.buffer, (p.finish_time, p))
+        entry = (v_finish, self._seq, p)
+        self._seq += 1
+        
+        if self._n < BUFFER_SIZE:
+            self._q_append[p.type_id](entry)
+            self._n += 1
         else:
-            if p.type == 'Gold':
-                # Preemption Logic
-                victim_idx = -1
-                for i, item in enumerate(self.buffer):
-                    if item[1].type == 'Bronze':
-                        victim_idx = i
-                        break
-                if victim_idx != -1:
-                    self.buffer.pop(victim_idx)
-                    heapq.heapify(self.buffer)
-                    heapq.heappush(self.buffer, (p.finish_time, p))
+            if p.type_id == GOLD:
+                # Preemption Logic: evict the newest Bronze packet
+                if self.qs[BRONZE]:
+                    self._pop_bronze()
+                    self._q_append[GOLD](entry)
 
 # ==========================================
 # 4. REAL-TIME PLOTTING LOGIC
@@ -154,6 +189,7 @@ colors = {'Gold': '#FFD700', 'Silver': '#A9A9A9', 'Bronze': '#D2691E'}
 
 for i, ax in enumerate(axs):
     ax.set_title(sims[i].name, fontweight='bold')
+    ax.set_xlim(0, WINDOW) # Fixed window so blitting never redraws the axes
     ax.set_ylim(0, 15) # Throughput scale
     ax.set_ylabel("Packets Served / Frame")
     ax.grid(True, linestyle=':', alpha=0.6)
@@ -168,53 +204,58 @@ for i, ax in enumerate(axs):
     if i == 0: ax.legend(loc='upper left') # Legend only on first graph
 
 global_packet_id = 0
+sim_frame = 0
+X_WINDOW = np.arange(WINDOW)
 
-def update(frame):
+def simulate_frame(frame):
     global global_packet_id
     
     # 1. Generate Traffic (Bursty)
-    chunk = []
-    # Every 10th frame, simulate a MASSIVE Gold burst to test robustness
+    # Every 20th frame, simulate a MASSIVE Gold burst to test robustness
     if frame % 20 == 0:
-        weights = [90, 5, 5] # 90% Gold burst
+        weights = [0.9, 0.05, 0.05] # 90% Gold burst
     else:
-        weights = [20, 30, 50] # Normal noise
+        weights = [0.2, 0.3, 0.5] # Normal noise
         
-    for _ in range(PACKETS_PER_FRAME):
-        p_type = random.choices(['Gold', 'Silver', 'Bronze'], weights=weights, k=1)[0]
-        chunk.append(Packet(global_packet_id, p_type, global_packet_id))
-        global_packet_id += 1
+    # Classes and sizes (1-3) for the whole chunk in one numpy draw each
+    types = np.random.choice(3, size=PACKETS_PER_FRAME, p=weights).tolist()
+    sizes = np.random.randint(1, 4, size=PACKETS_PER_FRAME).tolist()
+    ids = range(global_packet_id, global_packet_id + PACKETS_PER_FRAME)
+    chunk = [Packet(pid, t, pid, size) for pid, t, size in zip(ids, types, sizes)]
+    global_packet_id += PACKETS_PER_FRAME
+    
+    # One bulk draw of service coin flips per frame, independent per sim
+    svc = (np.random.random((len(sims), PACKETS_PER_FRAME)) < ROUTER_SPEED).tolist()
     
     # 2. Process Traffic
     for i, sim in enumerate(sims):
         sim.reset_frame_stats()
-        sim_packets = copy.deepcopy(chunk)
-        for p in sim_packets:
-            sim.process_step(p)
+        for p, serve in zip(chunk, svc[i]):
+            sim.process_step(p, serve)
         sim.record_history()
-        
-        # 3. Update Lines
-        x_data = range(len(sim.hist_gold))
-        # Keep window sliding (show last 50 frames)
-        if len(x_data) > 50:
-            x_view = x_data[-50:]
-            y_g = sim.hist_gold[-50:]
-            y_s = sim.hist_silver[-50:]
-            y_b = sim.hist_bronze[-50:]
-        else:
-            x_view = x_data
-            y_g = sim.hist_gold
-            y_s = sim.hist_silver
-            y_b = sim.hist_bronze
+
+def update(_):
+    global sim_frame
+    
+    # Advance several simulation frames per redraw, decoupling the
+    # simulation rate from the render rate
+    for _ in range(SIM_FRAMES_PER_RENDER):
+        simulate_frame(sim_frame)
+        sim_frame += 1
+    
+    # 3. Update Lines
+    for i, sim in enumerate(sims):
+        # Keep window sliding (show last WINDOW frames); x stays fixed and
+        # only the y-data shifts, so the axes never need redrawing
+        y_g, y_s, y_b = sim.history_view()
+        x_view = X_WINDOW[:len(y_g)]
             
         lines[i][0].set_data(x_view, y_g)
         lines[i][1].set_data(x_view, y_s)
         lines[i][2].set_data(x_view, y_b)
-        
-        axs[i].set_xlim(min(x_view), max(x_view) + 1)
 
     return sum(lines, [])
 
 print("Starting Bandwidth Battle Dashboard...")
-ani = animation.FuncAnimation(fig, update, interval=100, blit=False)
+ani = animation.FuncAnimation(fig, update, interval=100, blit=True, cache_frame_data=False)
 plt.show()
\ No newline at end of file
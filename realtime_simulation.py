@@ -1,9 +1,9 @@
-import random
-import heapq
-import copy
 from collections import deque
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
+import numpy as np
 
 # ==========================================
 # 1. CONFIGURATION
@@ -11,21 +11,29 @@ import matplotlib.animation as animation
 BUFFER_SIZE = 20
 ROUTER_SPEED = 0.7  # 70% service rate
 CHOKE_THRESHOLD = 8
-WEIGHTS = {'Gold': 4.0, 'Silver': 2.0, 'Bronze': 1.0}
+# Traffic classes are interned as small ints; per-class tuples below are
+# indexed by class id (Gold, Silver, Bronze)
+GOLD, SILVER, BRONZE = 0, 1, 2
+WEIGHTS = (4.0, 2.0, 1.0)
+INV_W = tuple(1.0 / w for w in WEIGHTS)
+TOKEN_CAP = (10.0, 5.0, 2.0)
+TOKEN_RATE = (5.0, 0.5, 0.2)  # Aggressive token rates
 PACKETS_PER_FRAME = 50  # Speed of animation
+CHUNKS_PER_RENDER = 5  # Traffic chunks simulated per redraw
+HISTORY_LEN = 5000  # Simulation steps visible in the rolling plot window (20 redraws)
 
 # ==========================================
 # 2. PACKET CLASS
 # ==========================================
 class Packet:
-    def __init__(self, id, type, arrival_time):
+    # No per-instance __dict__: smaller packets and faster attribute access
+    __slots__ = ('id', 'type_id', 'arrival_time', 'size')
+
+    def __init__(self, id, type_id, arrival_time, size):
         self.id = id
-        self.type = type
+        self.type_id = type_id
         self.arrival_time = arrival_time
-        self.size = random.randint(1, 3) 
-        self.finish_time = 0      
-    def __lt__(self, other):
-        return self.id < other.id
+        self.size = size
 
 # ==========================================
 # 3. STATEFUL SIMULATION CLASSES
@@ -37,138 +45,163 @@ class SimulationEngine:
         self.name = name
         self.color = color
         self.buffer = deque()
+        # Bound once so the per-packet hot path skips the attribute lookups
+        self._append = self.buffer.append
+        self._popleft = self.buffer.popleft
+        self._n = 0 # Cached queue length, kept in step with every append/pop
         # Stats
-        self.served = {'Gold': 0, 'Silver': 0, 'Bronze': 0}
-        self.dropped = {'Gold': 0, 'Silver': 0, 'Bronze': 0}
-        # History for plotting
-        self.hist_gold_loss = []
-        self.hist_buffer = []
-        self.hist_bronze_drop = []
+        self.served = [0, 0, 0]
+        self.dropped = [0, 0, 0]
+        # History for plotting: ring buffer of rows (Gold Loss %, Buffer, Bronze Drops)
+        # Fixed width so the x-axis never changes
+        self.hist = np.zeros((3, HISTORY_LEN))
+        self.idx = 0
     
-    def process_step(self, packet):
+    def process_step(self, packet, serve):
         raise NotImplementedError("Subclasses must implement logic")
 
-    def service(self):
-        # Common service logic: Router processes 1 packet (if random allows)
-        if self.buffer and random.random() < ROUTER_SPEED:
-            p = self.buffer.popleft()
-            self.served[p.type] += 1
+    def service(self, serve):
+        # Common service logic: Router processes 1 packet (if this step's coin flip allows)
+        if serve and self._n:
+            p = self._popleft()
+            self._n -= 1
+            self.served[p.type_id] += 1
             return True
         return False
 
     def record_stats(self):
         # Calculate Gold Loss %
-        g_total = self.served['Gold'] + self.dropped['Gold']
-        g_loss = (self.dropped['Gold'] / g_total * 100) if g_total > 0 else 0
+        g_total = self.served[GOLD] + self.dropped[GOLD]
+        g_loss = (self.dropped[GOLD] / g_total * 100) if g_total > 0 else 0
         
-        self.hist_gold_loss.append(g_loss)
-        self.hist_buffer.append(len(self.buffer))
-        self.hist_bronze_drop.append(self.dropped['Bronze'])
+        self.hist[:, self.idx % HISTORY_LEN] = (g_loss, self._n, self.dropped[BRONZE])
+        self.idx += 1
+
+    def history_view(self):
+        # Oldest-to-newest view of the ring buffer
+        if self.idx < HISTORY_LEN:
+            return self.hist[:, :self.idx]
+        return np.roll(self.hist, -(self.idx % HISTORY_LEN), axis=1)
 
 # --- 1. BASELINE ---
 class BaselineSim(SimulationEngine):
-    def process_step(self, p):
-        self.service()
-        if len(self.buffer) < BUFFER_SIZE:
-            self.buffer.append(p)
+    def process_step(self, p, serve):
+        self.service(serve)
+        if self._n < BUFFER_SIZE:
+            self._append(p)
+            self._n += 1
         else:
-            self.dropped[p.type] += 1
+            self.dropped[p.type_id] += 1
         self.record_stats()
 
 # --- 2. CHOKE PACKET ---
 class ChokeSim(SimulationEngine):
-    def process_step(self, p):
-        self.service()
+    def process_step(self, p, serve):
+        self.service(serve)
         
         # Trigger Logic
-        is_congested = len(self.buffer) > CHOKE_THRESHOLD
+        is_congested = self._n > CHOKE_THRESHOLD
         
         if is_congested:
-            if p.type == 'Gold':
-                if len(self.buffer) < BUFFER_SIZE:
-                    self.buffer.append(p)
+            if p.type_id == GOLD:
+                if self._n < BUFFER_SIZE:
+                    self._append(p)
+                    self._n += 1
                 else:
-                    self.dropped['Gold'] += 1
+                    self.dropped[GOLD] += 1
             else:
-                self.dropped[p.type] += 1 # Drop Silver/Bronze
+                self.dropped[p.type_id] += 1 # Drop Silver/Bronze
         else:
-            if len(self.buffer) < BUFFER_SIZE:
-                self.buffer.append(p)
+            if self._n < BUFFER_SIZE:
+                self._append(p)
+                self._n += 1
             else:
-                self.dropped[p.type] += 1
+                self.dropped[p.type_id] += 1
         self.record_stats()
 
 # --- 3. TOKEN BUCKET ---
 class TokenSim(SimulationEngine):
     def __init__(self, name, color):
         super().__init__(name, color)
-        # Aggressive Token Rates
-        self.buckets = {'Gold': [10, 10, 5.0], 'Silver': [5, 5, 0.5], 'Bronze': [2, 2, 0.2]}
+        self.tok = list(TOKEN_CAP)  # Buckets start full
+        self.last_refill = [0, 0, 0]  # Step at which each bucket was last topped up
+        self.step = 0
 
-    def process_step(self, p):
-        self.service()
+    def process_step(self, p, serve):
+        self.service(serve)
         
-        # Refill
-        for t in self.buckets:
-            cur, cap, rate = self.buckets[t]
-            self.buckets[t][0] = min(cap, cur + rate)
+        # Lazy refill: k clamped refills of `rate` equal one clamped refill of
+        # k * rate, so only the arriving packet's bucket is topped up
+        self.step += 1
+        t = p.type_id
+        tok = self.tok
+        tok[t] = min(TOKEN_CAP[t], tok[t] + TOKEN_RATE[t] * (self.step - self.last_refill[t]))
+        self.last_refill[t] = self.step
             
         needed = 1
-        if self.buckets[p.type][0] >= needed:
-            if len(self.buffer) < BUFFER_SIZE:
-                self.buckets[p.type][0] -= needed
-                self.buffer.append(p)
+        if tok[t] >= needed:
+            if self._n < BUFFER_SIZE:
+                tok[t] -= needed
+                self._append(p)
+                self._n += 1
             else:
-                self.dropped[p.type] += 1
+                self.dropped[p.type_id] += 1
         else:
-            self.dropped[p.type] += 1
+            self.dropped[p.type_id] += 1
         self.record_stats()
 
 # --- 4. WFQ (With Preemption) ---
 class WFQSim(SimulationEngine):
     def __init__(self, name, color):
         super().__init__(name, color)
-        self.buffer = [] # Heap list
-        self.last_finish = {'Gold': 0, 'Silver': 0, 'Bronze': 0}
+        # One deque per class, each already in finish-time order because
+        # last_finish is monotone per class
+        self.qs = [deque(), deque(), deque()]
+        self._q_append = [q.append for q in self.qs]
+        self._pop_bronze = self.qs[BRONZE].pop
+        self._seq = 0 # Monotone tiebreaker: FIFO among equal finish times
+        self.last_finish = [0, 0, 0]
 
-    def service(self):
-        if self.buffer and random.random() < ROUTER_SPEED:
-            _, p = heapq.heappop(self.buffer)
-            self.served[p.type] += 1
+    def service(self, serve):
+        if serve and self._n:
+            # Serve the class head with the smallest (finish, seq)
+            best = None
+            for q in self.qs:
+                if q and (best is None or q[0] < best[0]):
+                    best = q
+            _, _, p = best.popleft()
+            self._n -= 1
+            self.served[p.type_id] += 1
             return True
         return False
 
-    def process_step(self, p):
-        self.service()
+    def process_step(self, p, serve):
+        self.service(serve)
         
         # Calc Finish Time
-        prev_f = self.last_finish[p.type]
-        v_finish = max(p.arrival_time, prev_f) + (p.size / WEIGHTS[p.type])
-        p.finish_time = v_finish
-        self.last_finish[p.type] = v_finish
+        prev_f = self.last_finish[p.type_id]
+        v_finish = max(p.arrival_time, prev_f) + p.size * INV_W[p.type_id]
+        self.last_finish[p.type_id] = v_finish
         
-        if len(self.buffer) < BUFFER_SIZE:
-            heapq.heappush(self.buffer, (p.finish_time, p))
+        entry = (v_finish, self._seq, p)
+        self._seq += 1
+        
+        if self._n < BUFFER_SIZE:
+            self._q_append[p.type_id](entry)
+            self._n += 1
         else:
             # Preemption Logic (Kick Bronze for Gold)
-            if p.type == 'Gold':
-                victim_idx = -1
-                for i, item in enumerate(self.buffer):
-                    if item[1].type == 'Bronze':
-                        victim_idx = i
-                        break
-                
-                if victim_idx != -1:
-                    # Kill Bronze
-                    self.buffer.pop(victim_idx)
-                    heapq.heapify(self.buffer)
-                    self.dropped['Bronze'] += 1
+            if p.type_id == GOLD:
+                if self.qs[BRONZE]:
+                    # Kill the newest Bronze (latest finish time)
+                    self._pop_bronze()
+                    self.dropped[BRONZE] += 1
                     # Insert Gold
-                    heapq.heappush(self.buffer, (p.finish_time, p))
+                    self._q_append[GOLD](entry)
                 else:
-                    self.dropped['Gold'] += 1
+                    self.dropped[GOLD] += 1
             else:
-                self.dropped[p.type] += 1
+                self.dropped[p.type_id] += 1
         self.record_stats()
 
 
@@ -188,22 +221,24 @@ sims = [
 fig, (ax1, ax2, ax3) = plt.subplots(3, 1, figsize=(10, 12), sharex=True)
 plt.subplots_adjust(hspace=0.3)
 
-# Lines setup
-lines = {'gold': [], 'buffer': [], 'bronze': []}
-
-for sim in sims:
-    l1, = ax1.plot([], [], label=sim.name, color=sim.color, linewidth=2)
-    l2, = ax2.plot([], [], label=sim.name, color=sim.color, linewidth=1.5, alpha=0.7)
-    l3, = ax3.plot([], [], label=sim.name, color=sim.color, linewidth=2)
-    lines['gold'].append(l1)
-    lines['buffer'].append(l2)
-    lines['bronze'].append(l3)
+# Lines setup: one LineCollection per axis holding a segment per sim
+sim_colors = [sim.color for sim in sims]
+lines = {
+    'gold': LineCollection([], colors=sim_colors, linewidths=2),
+    'buffer': LineCollection([], colors=sim_colors, linewidths=1.5, alpha=0.7),
+    'bronze': LineCollection([], colors=sim_colors, linewidths=2),
+}
+ax1.add_collection(lines['gold'], autolim=False)
+ax2.add_collection(lines['buffer'], autolim=False)
+ax3.add_collection(lines['bronze'], autolim=False)
 
 # Graph Formatting
 ax1.set_title("Live Metric 1: Gold Packet Loss % (Goal: 0%)", fontweight='bold')
 ax1.set_ylabel("Loss %")
+ax1.set_xlim(0, HISTORY_LEN) # Shared x-axis, fixed so blitting never redraws it
 ax1.set_ylim(0, 40)
-ax1.legend(loc="upper right")
+ax1.legend(handles=[Line2D([], [], color=sim.color, linewidth=2, label=sim.name) for sim in sims],
+           loc="upper right")
 ax1.grid(True, linestyle='--', alpha=0.5)
 
 ax2.set_title("Live Metric 2: Buffer Occupancy (Queue Depth)", fontweight='bold')
@@ -212,8 +247,9 @@ ax2.set_ylim(0, 22)
 ax2.axhline(y=BUFFER_SIZE, color='black', linestyle=':', label='Max Capacity')
 ax2.grid(True, linestyle='--', alpha=0.5)
 
-ax3.set_title("Live Metric 3: Bronze Sacrifices (Total Drops)", fontweight='bold')
+ax3.set_title("Live Metric 3: Bronze Sacrifices (Drops in Window)", fontweight='bold')
 ax3.set_ylabel("Dropped Count")
+ax3.set_ylim(0, HISTORY_LEN * 0.6) # ~50% of traffic is Bronze
 ax3.set_xlabel("Time (Simulation Steps)")
 ax3.grid(True, linestyle='--', alpha=0.5)
 
@@ -221,43 +257,53 @@ ax3.grid(True, linestyle='--', alpha=0.5)
 global_packet_id = 0
 def get_packet_chunk():
     global global_packet_id
-    chunk = []
-    types = ['Gold', 'Silver', 'Bronze']
-    # 20% Gold, 30% Silver, 50% Bronze
-    for _ in range(PACKETS_PER_FRAME):
-        p_type = random.choices(types, weights=[20, 30, 50], k=1)[0]
-        chunk.append(Packet(global_packet_id, p_type, global_packet_id))
-        global_packet_id += 1
+    # 20% Gold, 30% Silver, 50% Bronze; sizes 1-3. One numpy draw each per chunk
+    types = np.random.choice(3, size=PACKETS_PER_FRAME, p=[0.2, 0.3, 0.5]).tolist()
+    sizes = np.random.randint(1, 4, size=PACKETS_PER_FRAME).tolist()
+    ids = range(global_packet_id, global_packet_id + PACKETS_PER_FRAME)
+    chunk = [Packet(pid, t, pid, size) for pid, t, size in zip(ids, types, sizes)]
+    global_packet_id += PACKETS_PER_FRAME
     return chunk
 
-# Animation Function
-def update(frame):
+X_HISTORY = np.arange(HISTORY_LEN)
+
+def simulate_chunk():
     # 1. Generate new traffic chunk
     new_packets = get_packet_chunk()
+    # One bulk draw of service coin flips per chunk, independent per sim
+    svc = (np.random.random((len(sims), PACKETS_PER_FRAME)) < ROUTER_SPEED).tolist()
     
     # 2. Feed SAME traffic to ALL simulations
     for i, sim in enumerate(sims):
-        # We must copy packets because WFQ modifies them (finish_time)
-        # and lists are mutable
-        sim_packets = copy.deepcopy(new_packets)
-        
-        for p in sim_packets:
-            sim.process_step(p)
-            
-        # 3. Update Line Data
-        x_data = range(len(sim.hist_gold_loss))
-        
-        lines['gold'][i].set_data(x_data, sim.hist_gold_loss)
-        lines['buffer'][i].set_data(x_data, sim.hist_buffer)
-        lines['bronze'][i].set_data(x_data, sim.hist_bronze_drop)
+        # Packets are read-only (WFQ keeps finish times in its queue entries)
+        for p, serve in zip(new_packets, svc[i]):
+            sim.process_step(p, serve)
 
-    # 4. Adjust X-Axis dynamically
-    current_len = len(sims[0].hist_gold_loss)
-    ax1.set_xlim(0, current_len)
-    ax3.set_ylim(0, max(sims[0].dropped['Bronze'], sims[1].dropped['Bronze'], 100) * 1.1)
+# Animation Function
+def update(frame):
+    # Simulate several chunks per redraw so the simulation rate is not
+    # capped by how fast matplotlib can render
+    for _ in range(CHUNKS_PER_RENDER):
+        simulate_chunk()
     
-    return lines['gold'] + lines['buffer'] + lines['bronze']
+    segments = {'gold': [], 'buffer': [], 'bronze': []}
+    for sim in sims:
+        # 3. Collect Line Data
+        y_gold, y_buffer, y_bronze = sim.history_view()
+        x_data = X_HISTORY[:len(y_gold)]
+        # Bronze drops counted from the start of the visible window, so the
+        # y-axis stays fixed instead of growing with the running total
+        y_bronze = y_bronze - y_bronze[0]
+        
+        segments['gold'].append(np.column_stack((x_data, y_gold)))
+        segments['buffer'].append(np.column_stack((x_data, y_buffer)))
+        segments['bronze'].append(np.column_stack((x_data, y_bronze)))
+
+    # 4. One artist update per axis
+    for key, lc in lines.items():
+        lc.set_segments(segments[key])
+    return tuple(lines.values())
 
 print("Starting Real-Time Simulation Dashboard...")
-ani = animation.FuncAnimation(fig, update, interval=50, blit=False)
+ani = animation.FuncAnimation(fig, update, interval=100, blit=True, cache_frame_data=False)
 plt.show()
\ No newline at end of file
@@ -1,9 +1,28 @@
-import random
-import heapq
-from collections import deque
+import sys
 import matplotlib.pyplot as plt
 import numpy as np
 
+def no_jit(*args, **kwargs):
+    # Stand-in for numba.njit: leaves the engines as plain Python
+    if args and callable(args[0]):
+        return args[0]
+    return lambda f: f
+
+try:
+    import engines_aot  # Built by `python simulation.py --build-aot`
+except ImportError:
+    engines_aot = None
+USE_AOT = engines_aot is not None and '--build-aot' not in sys.argv
+
+if USE_AOT:
+    njit = no_jit  # Precompiled engines are used; no need to load Numba
+else:
+    try:
+        from numba import njit
+    except ImportError:
+        # Numba is optional: fall back to running the engines as plain Python
+        njit = no_jit
+
 # ==========================================
 # 1. CONFIGURATION & SIMULATION LOGIC
 # ==========================================
@@ -11,145 +30,240 @@ BUFFER_SIZE = 20
 TOTAL_PACKETS = 50000     
 ROUTER_SPEED = 0.7        
 CHOKE_THRESHOLD = 8      
-WEIGHTS = {'Gold': 4.0, 'Silver': 2.0, 'Bronze': 1.0}
-
-class Packet:
-    def __init__(self, id, type, arrival_time):
-        self.id = id
-        self.type = type
-        self.arrival_time = arrival_time
-        self.size = random.randint(1, 3) 
-        self.finish_time = 0      
-    def __lt__(self, other):
-        return self.id < other.id
+# Traffic classes are encoded as small ints so the engines can run under Numba
+GOLD, SILVER, BRONZE = 0, 1, 2
+TYPE_NAMES = ('Gold', 'Silver', 'Bronze')
+# Per-class arrays below are indexed by class id (Gold, Silver, Bronze)
+WEIGHTS = np.array([4.0, 2.0, 1.0])
+TOKEN_CAP = np.array([10.0, 5.0, 2.0])
+TOKEN_RATE = np.array([5.0, 0.5, 0.2])
+# WFQ finish times are multiples of 1/4 (size 1-3, weights 4/2/1), so
+# scaling by 4 keeps them exact as int64 heap keys
+WFQ_SCALE = 4
 
 def generate_traffic(n):
-    packets = []
-    types = ['Gold', 'Silver', 'Bronze']
+    # Struct-of-arrays traffic: one entry per packet, arrival time == index
+    ids = np.arange(n, dtype=np.int32)
     # Weights: 20% Gold, 30% Silver, 50% Bronze
-    for i in range(n):
-        p_type = random.choices(types, weights=[20, 30, 50], k=1)[0]
-        packets.append(Packet(i, p_type, i))
-    return packets
-
-def init_stats():
-    return {
-        'Gold':   {'served': 0, 'dropped': 0},
-        'Silver': {'served': 0, 'dropped': 0},
-        'Bronze': {'served': 0, 'dropped': 0}
-    }
+    types = np.random.choice(np.array([GOLD, SILVER, BRONZE], dtype=np.int8),
+                             size=n, p=[0.2, 0.3, 0.5])
+    sizes = np.random.randint(1, 4, size=n, dtype=np.int8)
+    arrivals = np.arange(n, dtype=np.int32)
+    # Every engine reads the same batch, so freeze it against accidental writes
+    for a in (ids, types, sizes, arrivals):
+        a.setflags(write=False)
+    return ids, types, sizes, arrivals
+
+def to_stats(served, dropped):
+    return {name: {'served': int(served[t]), 'dropped': int(dropped[t])}
+            for t, name in enumerate(TYPE_NAMES)}
 
 # --- SIMULATION ENGINES (OPTIMIZED) ---
-def run_baseline(packets):
-    buffer = deque()
-    stats = init_stats()
-    for p in packets:
-        if buffer and random.random() < ROUTER_SPEED:
-            proc_p = buffer.popleft()
-            stats[proc_p.type]['served'] += 1
-        if len(buffer) < BUFFER_SIZE:
-            buffer.append(p)
+# Each engine takes the traffic arrays, a precomputed service coin flip
+# per step, and per-class served/dropped counters (length 3) that it
+# fills in place. FIFO buffers are a ring of
+# packet indices with head/count instead of a deque.
+@njit(cache=True)
+def run_baseline(types, sizes, arrivals, svc, served, dropped):
+    buf = np.empty(BUFFER_SIZE, dtype=np.int32)
+    head = 0
+    count = 0
+    for i in range(types.shape[0]):
+        if count > 0 and svc[i]:
+            served[types[buf[head]]] += 1
+            head = (head + 1) % BUFFER_SIZE
+            count -= 1
+        if count < BUFFER_SIZE:
+            buf[(head + count) % BUFFER_SIZE] = i
+            count += 1
         else:
-            stats[p.type]['dropped'] += 1
-    while buffer:
-        proc_p = buffer.popleft()
-        stats[proc_p.type]['served'] += 1
-    return stats
-
-def run_choke(packets):
-    buffer = deque()
-    stats = init_stats()
+            dropped[types[i]] += 1
+    while count > 0:
+        served[types[buf[head]]] += 1
+        head = (head + 1) % BUFFER_SIZE
+        count -= 1
+
+@njit(cache=True)
+def run_choke(types, sizes, arrivals, svc, served, dropped):
+    buf = np.empty(BUFFER_SIZE, dtype=np.int32)
+    head = 0
+    count = 0
     choke_active = False
-    for p in packets:
-        if buffer and random.random() < ROUTER_SPEED:
-            proc_p = buffer.popleft()
-            stats[proc_p.type]['served'] += 1
-        if len(buffer) > CHOKE_THRESHOLD:
+    for i in range(types.shape[0]):
+        if count > 0 and svc[i]:
+            served[types[buf[head]]] += 1
+            head = (head + 1) % BUFFER_SIZE
+            count -= 1
+        if count > CHOKE_THRESHOLD:
             choke_active = True
-        elif len(buffer) < CHOKE_THRESHOLD / 2:
+        elif count < CHOKE_THRESHOLD / 2:
             choke_active = False
-        dropped = False
-        if choke_active:
-            if p.type == 'Gold':
-                if len(buffer) < BUFFER_SIZE: buffer.append(p)
-                else: dropped = True
-            else: dropped = True 
+        # While choked only Gold is admitted
+        if (not choke_active or types[i] == GOLD) and count < BUFFER_SIZE:
+            buf[(head + count) % BUFFER_SIZE] = i
+            count += 1
         else:
-            if len(buffer) < BUFFER_SIZE: buffer.append(p)
-            else: dropped = True
-        if dropped: stats[p.type]['dropped'] += 1
-    while buffer:
-        proc_p = buffer.popleft()
-        stats[proc_p.type]['served'] += 1
-    return stats
-
-def run_token_bucket(packets):
-    buckets = {'Gold': [10, 10, 5.0], 'Silver': [5, 5, 0.5], 'Bronze': [2, 2, 0.2]}
-    buffer = deque()
-    stats = init_stats()
-    for p in packets:
-        for t in buckets:
-            cur, cap, rate = buckets[t]
-            buckets[t][0] = min(cap, cur + rate)
-        if buffer and random.random() < ROUTER_SPEED:
-            proc_p = buffer.popleft()
-            stats[proc_p.type]['served'] += 1
+            dropped[types[i]] += 1
+    while count > 0:
+        served[types[buf[head]]] += 1
+        head = (head + 1) % BUFFER_SIZE
+        count -= 1
+
+@njit(cache=True)
+def run_token_bucket(types, sizes, arrivals, svc, served, dropped):
+    tok = TOKEN_CAP.copy()  # Buckets start full
+    last_refill = np.zeros(3, dtype=np.int64)
+    buf = np.empty(BUFFER_SIZE, dtype=np.int32)
+    head = 0
+    count = 0
+    for i in range(types.shape[0]):
+        if count > 0 and svc[i]:
+            served[types[buf[head]]] += 1
+            head = (head + 1) % BUFFER_SIZE
+            count -= 1
+        t = types[i]
+        # Lazy refill of the arriving packet's bucket (clamped refills compose)
+        tok[t] = min(TOKEN_CAP[t], tok[t] + TOKEN_RATE[t] * (i + 1 - last_refill[t]))
+        last_refill[t] = i + 1
         needed = 1
-        if buckets[p.type][0] >= needed:
-            if len(buffer) < BUFFER_SIZE:
-                buckets[p.type][0] -= needed
-                buffer.append(p)
-            else: stats[p.type]['dropped'] += 1 
-        else: stats[p.type]['dropped'] += 1 
-    while buffer:
-        proc_p = buffer.popleft()
-        stats[proc_p.type]['served'] += 1
-    return stats
-
-def run_wfq(packets):
-    priority_queue = [] 
-    stats = init_stats()
-    last_finish = {'Gold': 0, 'Silver': 0, 'Bronze': 0}
-    for p in packets:
-        if priority_queue and random.random() < ROUTER_SPEED:
-            _, proc_p = heapq.heappop(priority_queue)
-            stats[proc_p.type]['served'] += 1
-        prev_f = last_finish[p.type]
-        virtual_finish = max(p.arrival_time, prev_f) + (p.size / WEIGHTS[p.type])
-        p.finish_time = virtual_finish
-        last_finish[p.type] = virtual_finish
-        if len(priority_queue) < BUFFER_SIZE:
-            heapq.heappush(priority_queue, (p.finish_time, p))
+        if tok[t] >= needed and count < BUFFER_SIZE:
+            tok[t] -= needed
+            buf[(head + count) % BUFFER_SIZE] = i
+            count += 1
         else:
-            if p.type == 'Gold':
-                victim_index = -1
-                for i, item in enumerate(priority_queue):
-                    if item[1].type == 'Bronze':
-                        victim_index = i
-                        break
-                if victim_index != -1:
-                    victim = priority_queue.pop(victim_index)
-                    heapq.heapify(priority_queue)
-                    stats['Bronze']['dropped'] += 1
-                    stats['Bronze']['served'] -= 0 
-                    heapq.heappush(priority_queue, (p.finish_time, p))
-                else: stats['Gold']['dropped'] += 1
-            else: stats[p.type]['dropped'] += 1
-    while priority_queue:
-        _, proc_p = heapq.heappop(priority_queue)
-        stats[proc_p.type]['served'] += 1
-    return stats
+            dropped[t] += 1
+    while count > 0:
+        served[types[buf[head]]] += 1
+        head = (head + 1) % BUFFER_SIZE
+        count -= 1
+
+# --- WFQ HEAP (heapq is not nopython-compatible) ---
+# Binary min-heap over two parallel arrays keyed by (finish, packet index);
+# the index tiebreak matches the old Packet.__lt__ ordering by id.
+@njit(cache=True)
+def _heap_less(keys, idx, a, b):
+    return keys[a] < keys[b] or (keys[a] == keys[b] and idx[a] < idx[b])
+
+@njit(cache=True)
+def _heap_swap(keys, idx, a, b):
+    keys[a], keys[b] = keys[b], keys[a]
+    idx[a], idx[b] = idx[b], idx[a]
+
+@njit(cache=True)
+def _sift_up(keys, idx, pos):
+    while pos > 0:
+        parent = (pos - 1) // 2
+        if not _heap_less(keys, idx, pos, parent):
+            break
+        _heap_swap(keys, idx, pos, parent)
+        pos = parent
+
+@njit(cache=True)
+def _sift_down(keys, idx, n, pos):
+    while True:
+        child = 2 * pos + 1
+        if child >= n:
+            break
+        if child + 1 < n and _heap_less(keys, idx, child + 1, child):
+            child += 1
+        if not _heap_less(keys, idx, child, pos):
+            break
+        _heap_swap(keys, idx, pos, child)
+        pos = child
+
+@njit(cache=True)
+def _heap_remove(keys, idx, n, pos):
+    # Move the last entry into pos and restore the heap; returns the new size
+    n -= 1
+    if pos != n:
+        keys[pos] = keys[n]
+        idx[pos] = idx[n]
+        _sift_down(keys, idx, n, pos)
+        _sift_up(keys, idx, pos)
+    return n
+
+@njit(cache=True)
+def run_wfq(types, sizes, arrivals, svc, served, dropped):
+    keys = np.empty(BUFFER_SIZE, dtype=np.int64)
+    idx = np.empty(BUFFER_SIZE, dtype=np.int32)
+    n = 0
+    last_finish = np.zeros(3, dtype=np.int64)
+    for i in range(types.shape[0]):
+        if n > 0 and svc[i]:
+            served[types[idx[0]]] += 1
+            n = _heap_remove(keys, idx, n, 0)
+        t = types[i]
+        # Scaled virtual finish: max(arrival, prev) + size / weight
+        v_finish = max(np.int64(arrivals[i]) * WFQ_SCALE, last_finish[t]) \
+            + np.int64(sizes[i] * WFQ_SCALE / WEIGHTS[t])
+        last_finish[t] = v_finish
+        if n >= BUFFER_SIZE:
+            if t != GOLD:
+                dropped[t] += 1
+                continue
+            # Preemption: evict the first Bronze packet in the buffer
+            victim = -1
+            for j in range(n):
+                if types[idx[j]] == BRONZE:
+                    victim = j
+                    break
+            if victim == -1:
+                dropped[GOLD] += 1
+                continue
+            n = _heap_remove(keys, idx, n, victim)
+            dropped[BRONZE] += 1
+        keys[n] = v_finish
+        idx[n] = i
+        _sift_up(keys, idx, n)
+        n += 1
+    while n > 0:
+        served[types[idx[0]]] += 1
+        n = _heap_remove(keys, idx, n, 0)
+
+def run(engine, traffic):
+    _, types, sizes, arrivals = traffic
+    # Independent service coin flips for each engine, drawn in bulk
+    svc = np.random.random(types.shape[0]) < ROUTER_SPEED
+    served = np.zeros(3, dtype=np.int64)
+    dropped = np.zeros(3, dtype=np.int64)
+    engine(types, sizes, arrivals, svc, served, dropped)
+    return to_stats(served, dropped)
+
+# ==========================================
+# 2. AHEAD-OF-TIME ENGINES (OPTIONAL)
+# ==========================================
+# `python simulation.py --build-aot` compiles the engines once into an
+# engines_aot extension module; later runs use it and skip both the
+# Numba import and the JIT/cache load at startup. Rebuild after editing
+# the engines, or delete engines_aot*.so to go back to the JIT.
+ENGINE_SIG = 'void(int8[:], int8[:], int32[:], boolean[:], int64[:], int64[:])'
+
+if '--build-aot' in sys.argv:
+    from numba.pycc import CC
+    cc = CC('engines_aot')
+    for engine in (run_baseline, run_choke, run_token_bucket, run_wfq):
+        cc.export(engine.__name__, ENGINE_SIG)(engine.py_func)
+    cc.compile()
+    print("Built engines_aot; rerun without --build-aot to use it.")
+    sys.exit()
+
+if USE_AOT:
+    run_baseline = engines_aot.run_baseline
+    run_choke = engines_aot.run_choke
+    run_token_bucket = engines_aot.run_token_bucket
+    run_wfq = engines_aot.run_wfq
 
 # ==========================================
-# 2. RUN SIMULATION & PLOT
+# 3. RUN SIMULATION & PLOT
 # ==========================================
 print("Running simulations... please wait.")
+# One shared, read-only traffic batch; no per-engine copies needed
 traffic = generate_traffic(TOTAL_PACKETS)
 stats_list = [
-    run_baseline(traffic.copy()),
-    run_choke(traffic.copy()),
-    run_token_bucket(traffic.copy()),
-    run_wfq(traffic.copy())
+    run(run_baseline, traffic),
+    run(run_choke, traffic),
+    run(run_token_bucket, traffic),
+    run(run_wfq, traffic)
 ]
 methods = ['Baseline', 'Choke', 'Token', 'WFQ']
 